@@ -1,5 +1,5 @@
+import asyncio
 import os
-import subprocess
 from typing import List
 
 
@@ -13,13 +13,21 @@ class GitManager:
     find_git_directories(root_dir: str) -> List[str]:
         Recursively finds '.git' directories under the specified root directory.
 
-    git_reset_and_pull(directory: str) -> None:
+    has_ssh_command(directory: str) -> bool:
+        Checks whether the repository configures a custom SSH command.
+
+    git_reset_and_pull(directory: str, semaphore: asyncio.Semaphore) -> None:
         Performs 'git reset --hard' and 'git pull' in the specified directory.
 
+    reset_and_pull_all() -> None:
+        Resets and pulls all found repositories concurrently.
+
     execute() -> None:
         Executes the git commands in all .git directories found under the script's directory.
     """
 
+    MAX_CONCURRENCY: int = 16
+
     def __init__(self, root_dir: str) -> None:
         """
         Initializes the GitManager with the root directory.
@@ -40,38 +48,110 @@ class GitManager:
         List[str]: A list of absolute paths to directories containing '.git'.
         """
         git_dirs: List[str] = []
-        for dirpath, _, _ in os.walk(self.root_dir):
-            if ".git" in os.listdir(dirpath):
-                git_dirs.append(os.path.abspath(dirpath))
+        pending: List[str] = [os.path.abspath(self.root_dir)]
+        while pending:
+            dirpath = pending.pop()
+            try:
+                entries = os.scandir(dirpath)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.name == ".git":
+                        git_dirs.append(dirpath)
+                    elif entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
         self.git_directories = git_dirs
         return git_dirs
 
-    def git_reset_and_pull(self, directory: str) -> None:
+    @staticmethod
+    async def has_ssh_command(directory: str) -> bool:
+        """
+        Checks whether the repository configures a custom SSH command.
+
+        Args:
+        ----
+        directory (str): The directory of the repository.
+
+        Returns:
+        -------
+        bool: True if 'core.sshCommand' is set for the repository.
+        """
+        process = await asyncio.create_subprocess_exec(
+            "git",
+            "config",
+            "--get",
+            "core.sshCommand",
+            cwd=directory,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        return await process.wait() == 0
+
+    async def git_reset_and_pull(
+        self, directory: str, semaphore: asyncio.Semaphore
+    ) -> None:
         """
         Performs 'git reset --hard' and 'git pull' in the specified directory.
 
+        The pull is skipped if the reset fails, and the output of a failing
+        command is printed with the error. The commands cannot prompt for
+        credentials, so a repository needing authentication fails with its
+        own error instead of waiting for input on the shared terminal. SSH is
+        run in batch mode unless GIT_SSH or core.sshCommand selects a custom
+        SSH command, which is then left to handle authentication itself.
+
         Args:
         ----
         directory (str): The directory where the git commands should be executed.
-
-        Raises:
-        ------
-        subprocess.CalledProcessError: If an error occurs while executing the git commands.
+        semaphore (asyncio.Semaphore): Limits how many repositories are updated at once.
         """
-        try:
-            subprocess.run(["git", "reset", "--hard"], cwd=directory, check=True)
-            subprocess.run(["git", "pull"], cwd=directory, check=True)
+        env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+        async with semaphore:
+            if not any(
+                name in env for name in ("GIT_SSH_COMMAND", "GIT_SSH")
+            ) and not await self.has_ssh_command(directory):
+                env["GIT_SSH_COMMAND"] = "ssh -o BatchMode=yes"
+            for command in (["git", "reset", "--hard"], ["git", "pull"]):
+                process = await asyncio.create_subprocess_exec(
+                    *command,
+                    cwd=directory,
+                    env=env,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                )
+                output, _ = await process.communicate()
+                if process.returncode != 0:
+                    print(
+                        f"Error executing git commands in {directory}: "
+                        f"'{' '.join(command)}' returned exit status {process.returncode}"
+                    )
+                    print(output.decode(errors="replace").rstrip())
+                    return
             print(f"Git commands executed successfully in {directory}")
-        except subprocess.CalledProcessError as e:
-            print(f"Error executing git commands in {directory}: {e}")
+
+    async def reset_and_pull_all(self) -> None:
+        """
+        Resets and pulls all found repositories concurrently.
+
+        At most MAX_CONCURRENCY repositories are updated at the same time.
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        await asyncio.gather(
+            *(
+                self.git_reset_and_pull(git_dir, semaphore)
+                for git_dir in self.git_directories
+            )
+        )
 
     def execute(self) -> None:
         """
         Executes git commands in all '.git' directories found under the root directory.
         """
         self.find_git_directories()
-        for git_dir in self.git_directories:
-            self.git_reset_and_pull(git_dir)
+        asyncio.run(self.reset_and_pull_all())
 
 
 def main() -> None:
@@ -1,75 +1,265 @@
-import datetime
+import atexit
 import logging
 import os
+import queue
 import re
-from multiprocessing import Pool, cpu_count
-from typing import List, Optional, Set
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from logging.handlers import QueueHandler, QueueListener
+from typing import FrozenSet, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Buffer size of the rename log, so records are written in large chunks.
+_LOG_BUFFER_SIZE = 128 * 1024
+
+# The listener writing queued log records, started by the first FileRenamer.
+_log_listener: Optional[QueueListener] = None
+
+# Characters stripped from filenames before they are split into words.
+_SANITIZE_RE = re.compile(r'[\\/;:\'"`%$#@!*+=]')
+
+# Matches the special characters and " And " so both are handled in one pass.
+_CLEAN_RE = re.compile(r'[\\/;:\'"`%$#@!*+=]| And ')
+
+# Splits a base filename into CamelCase words, acronyms and alphanumeric runs.
+_WORD_RE = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?=[A-Z]|$)|[^\W_]+")
+
+# Articles, conjunctions and prepositions kept lowercase after the first word.
+_STOP_WORDS: FrozenSet[str] = frozenset(
+    {
+        "a",
+        "an",
+        "and",
+        "as",
+        "at",
+        "but",
+        "by",
+        "for",
+        "if",
+        "in",
+        "nor",
+        "of",
+        "on",
+        "or",
+        "so",
+        "the",
+        "to",
+        "up",
+        "yet",
+        "with",
+        "within",
+        "aboard",
+        "about",
+        "above",
+        "across",
+        "after",
+        "against",
+        "along",
+        "amid",
+        "among",
+        "around",
+        "before",
+        "behind",
+        "below",
+        "beneath",
+        "beside",
+        "between",
+        "beyond",
+        "concerning",
+        "considering",
+    }
+)
+
+
+def _clean_match(match: "re.Match[str]") -> str:
+    """
+    Return the replacement for a `_CLEAN_RE` match.
+
+    Args:
+    ----
+    match (re.Match[str]): A special character or " And ".
 
-from spellchecker import SpellChecker
+    Returns:
+    -------
+    str: " & " for " And ", otherwise an empty string.
+    """
+    return " & " if match.group() == " And " else ""
 
 
-class EnglishDictionary:
+def _is_transformed(filename: str) -> bool:
     """
-    A class to manage and provide a set of common English words and custom terms.
+    Check whether a filename is already in the form `_transform_filename` produces.
 
-    Methods:
-    --------
-    load_english_dictionary() -> Set[str]:
-        Loads a dictionary of common English words, including additional words and Roman numerals.
+    Args:
+    ----
+    filename (str): The filename to check.
+
+    Returns:
+    -------
+    bool: True if transforming the filename would leave it unchanged.
     """
+    if _CLEAN_RE.search(filename):
+        return False
 
-    def __init__(self):
-        self.dictionary: Set[str] = self.load_english_dictionary()
+    base_filename, _, _ = filename.rpartition(".")
+    if not base_filename:
+        return False
 
-    def load_english_dictionary(self) -> Set[str]:
-        """
-        Load a dictionary of common English words.
+    for i, word in enumerate(base_filename.split("_")):
+        if not (word.isascii() and word.isalpha()):
+            return False
+        lowered = word.lower()
+        if i and lowered in _STOP_WORDS:
+            if word != lowered:
+                return False
+        elif word != word.title():
+            return False
+
+    return True
+
+
+@lru_cache(maxsize=4096)
+def _transform_filename(filename: str) -> str:
+    """
+    Split concatenated words in a filename and convert them to title case.
+
+    The result depends only on the arguments, so repeated calls are memoized.
+
+    Args:
+    ----
+    filename (str): The filename to split.
+
+    Returns:
+    -------
+    str: The sanitized filename.
+    """
+    if not filename:
+        raise ValueError("Filename cannot be empty.")
+
+    # Files renamed on a previous run need no regex work at all
+    if _is_transformed(filename):
+        return filename
+
+    # Remove special characters and replace "And" with "&" in a single scan
+    filename = _CLEAN_RE.sub(_clean_match, filename)
+
+    # Split the filename and extension in a single scan; like os.path.splitext,
+    # leading dots belong to the base name, so "..pdf" has no extension
+    stripped = filename.lstrip(".")
+    base_filename, dot, extension = stripped.rpartition(".")
+    if base_filename:
+        base_filename = filename[: len(filename) - len(stripped)] + base_filename
+        extension = dot + extension
+    else:
+        base_filename, extension = filename, ""
+
+    # Use regex to split the base filename into words based on various patterns
+    words: List[str] = _WORD_RE.findall(base_filename)
+
+    # Convert to title case, keeping articles, conjunctions, and prepositions
+    # lowercase unless they are the first word
+    for i, word in enumerate(words):
+        lowered = word.lower()
+        if i and lowered in _STOP_WORDS:
+            words[i] = lowered
+        else:
+            words[i] = word.title()
+
+    # Join the words with underscores
+    joined_filename = "_".join(words)
+
+    # Combine the base filename and extension
+    new_filename = f"{joined_filename}{extension}"
+
+    return new_filename
+
+
+class _BufferedFileHandler(logging.FileHandler):
+    """
+    A file handler that leaves flushing to its buffered stream.
+
+    logging.FileHandler flushes after every record, which costs one write
+    syscall per rename. Here the stream is opened with a large buffer and is
+    only written out when the buffer fills or the handler is closed.
+    """
+
+    def _open(self):
+        return open(
+            self.baseFilename,
+            self.mode,
+            buffering=_LOG_BUFFER_SIZE,
+            encoding=self.encoding,
+            errors=self.errors,
+        )
+
+    def flush(self) -> None:
+        pass
+
+
+def _stop_log_listener(listener: QueueListener, handler: logging.Handler) -> None:
+    """
+    Stop the log listener and write out the buffered records.
+
+    Args:
+    ----
+    listener (QueueListener): The listener to stop.
+    handler (logging.Handler): The file handler the listener writes to.
+    """
+    listener.stop()
+    handler.close()
 
-        Returns:
-        --------
-        Set[str]: A set containing common English words.
-        """
-        spell: SpellChecker = SpellChecker()
-        english_dict: Set[str] = set(spell.word_frequency.keys())
-
-        # Additional words to add to the dictionary
-        additional_words = {
-            "zkSNARKS",
-            "SNARKS",
-            "SNARGS",
-            "STARKS",
-            "TeX",
-            "LaTeX",
-            "ODE",
-            "PDE",
-            "CRC",
-        }
-
-        # Roman numerals from I to XIII
-        roman_numerals = {
-            "I",
-            "II",
-            "III",
-            "IV",
-            "V",
-            "VI",
-            "VII",
-            "VIII",
-            "IX",
-            "X",
-            "XI",
-            "XII",
-            "XIII",
-        }
-
-        # Convert additional words to title case and add them to the dictionary
-        additional_words_title_case = set(word.title() for word in additional_words)
-
-        # Add the words to the dictionary
-        english_dict.update(additional_words_title_case)
-        english_dict.update(roman_numerals)
-
-        return english_dict
+
+def _rename_file(
+    directory: str, filename: str, new_filename: str, dir_fd: Optional[int] = None
+) -> None:
+    """
+    Rename a single file in the given directory.
+
+    Args:
+    ----
+    directory (str): The directory containing the file.
+    filename (str): The filename to rename.
+    new_filename (str): The transformed filename.
+    dir_fd (Optional[int]): An open descriptor for `directory`. When given, the
+                            names are resolved relative to it instead of walking
+                            the full path again for every rename.
+    """
+    try:
+        if dir_fd is None:
+            os.rename(
+                os.path.join(directory, filename),
+                os.path.join(directory, new_filename),
+            )
+        else:
+            os.rename(filename, new_filename, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Renamed '%s' to '%s'", filename, new_filename)
+    except FileExistsError:
+        logger.warning("Skipped renaming. File '%s' already exists.", filename)
+    except FileNotFoundError as e:
+        logger.error("File not found: %s", e)
+    except PermissionError as e:
+        logger.error("Permission denied: %s", e)
+    except OSError as e:
+        logger.error("OS error occurred: %s", e)
+
+
+def _rename_batch(
+    directory: str, renames: List[Tuple[str, str]], dir_fd: Optional[int] = None
+) -> None:
+    """
+    Rename a batch of files in the given directory.
+
+    Args:
+    ----
+    directory (str): The directory containing the files.
+    renames (List[Tuple[str, str]]): Pairs of (filename, new_filename).
+    dir_fd (Optional[int]): An open descriptor for `directory`, see `_rename_file`.
+    """
+    for filename, new_filename in renames:
+        _rename_file(directory, filename, new_filename, dir_fd)
 
 
 class FileRenamer:
@@ -86,31 +276,61 @@ class FileRenamer:
     sanitize_filename(filename: str) -> str:
         Removes special characters from the filename using regular expressions.
 
-    split_concatenated_words(filename: str, english_dictionary: Set[str]) -> str:
-        Splits concatenated words in a filename based on certain rules using the provided English dictionary.
+    split_concatenated_words(filename: str) -> str:
+        Splits concatenated words in a filename and converts them to title case.
 
-    rename_file(filename: str, english_dictionary: Set[str]) -> None:
-        Renames a single file in the current directory by utilizing split_concatenated_words().
+    rename_file(filename: str) -> None:
+        Renames a single file in the directory to its transformed name.
 
     rename_files() -> None:
-        Renames files in the current directory using multiprocessing for improved performance.
+        Renames files in the current directory using a thread pool for improved performance.
     """
 
-    def __init__(self, directory: Optional[str] = None):
+    # Below this many files a thread pool costs more than it saves.
+    SERIAL_THRESHOLD: int = 32
+
+    def __init__(self, directory: Optional[str] = None, quiet: bool = False):
+        """
+        Initialize the FileRenamer.
+
+        Args:
+        ----
+        directory (Optional[str]): The directory containing files to rename. Defaults to the current directory.
+        quiet (bool): If True, only warnings and errors are logged, not every successful rename.
+        """
         self.directory: str = directory or os.getcwd()
-        self.english_dictionary = EnglishDictionary().dictionary
         self.setup_logging()
+        logger.setLevel(logging.WARNING if quiet else logging.NOTSET)
 
     def setup_logging(self) -> None:
         """
         Set up logging for the renaming process.
+
+        Records are pushed onto a queue and written to the log file by a single
+        listener thread, so rename workers never block on log file I/O. The
+        log file is buffered and written out when the process exits. Only the
+        first FileRenamer sets this up, and only if logging is not configured
+        yet; otherwise records go to the existing handlers.
         """
+        global _log_listener
+        if _log_listener is not None or logging.getLogger().handlers:
+            return
+
         log_file = os.path.join(
-            self.directory, f"rename_{datetime.datetime.now():%Y-%m-%d}.log"
-        )
-        logging.basicConfig(
-            filename=log_file, level=logging.INFO, format="%(asctime)s - %(message)s"
+            self.directory, f"rename_{time.strftime('%Y-%m-%d')}.log"
         )
+        file_handler = _BufferedFileHandler(log_file, delay=True)
+        file_handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _log_listener = QueueListener(log_queue, file_handler)
+        _log_listener.start()
+        atexit.register(_stop_log_listener, _log_listener, file_handler)
+
+        # The listener's file handler adds the timestamp
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter("%(message)s"))
+        logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
 
     @staticmethod
     def sanitize_filename(filename: str) -> str:
@@ -125,11 +345,11 @@ class FileRenamer:
         -------
         str: The sanitized filename.
         """
-        return re.sub(r'[\\/;:\'"`%$#@!*+=]', "", filename)
+        return _SANITIZE_RE.sub("", filename)
 
     def split_concatenated_words(self, filename: str) -> str:
         """
-        Split concatenated words using the English dictionary and convert to title case.
+        Split concatenated words and convert them to title case.
 
         Args:
         ----
@@ -139,137 +359,76 @@ class FileRenamer:
         -------
         str: The sanitized filename.
         """
-        if not filename:
-            raise ValueError("Filename cannot be empty.")
-
-        # Sanitize the filename
-        filename = self.sanitize_filename(filename)
-
-        # Replace "And" with "&"
-        filename = filename.replace(" And ", " & ")
-
-        # Split the filename and extension
-        base_filename, extension = os.path.splitext(filename)
-
-        # Use regex to split the base filename into words based on various patterns
-        words: List[str] = re.findall(
-            r"[A-Z]?[a-z]+|[A-Z]+(?=[A-Z]|$)|[^\W_]+", base_filename
-        )
-
-        # Convert to title case, handling exceptions for articles, conjunctions, and prepositions
-        conjunctions_prepositions = sorted(
-            [
-                "a",
-                "an",
-                "and",
-                "as",
-                "at",
-                "but",
-                "by",
-                "for",
-                "if",
-                "in",
-                "nor",
-                "of",
-                "on",
-                "or",
-                "so",
-                "the",
-                "to",
-                "up",
-                "yet",
-                "with",
-                "within",
-                "aboard",
-                "about",
-                "above",
-                "across",
-                "after",
-                "against",
-                "along",
-                "amid",
-                "among",
-                "around",
-                "as",
-                "at",
-                "before",
-                "behind",
-                "below",
-                "beneath",
-                "beside",
-                "between",
-                "beyond",
-                "but",
-                "by",
-                "concerning",
-                "considering",
-            ]
-        )
-
-        for i, word in enumerate(words):
-            if i != 0 and word.lower() in conjunctions_prepositions:
-                words[i] = word.lower()
-            else:
-                words[i] = word.title()
-
-        # Ensure words not in the dictionary are added as title case
-        for i, word in enumerate(words):
-            if word.lower() not in self.english_dictionary:
-                words[i] = word.title()
-
-        # Join the words with underscores
-        joined_filename = "_".join(words)
-
-        # Combine the base filename and extension
-        new_filename = f"{joined_filename}{extension}"
-
-        return new_filename
+        return _transform_filename(filename)
 
     def rename_file(self, filename: str) -> None:
         """
-        Rename a single file in the current directory.
+        Rename a single file in the directory to its transformed name.
 
         Args:
         ----
         filename (str): The filename to rename.
         """
-        try:
-            old_filename: str = os.path.join(self.directory, filename)
-            new_filename: str = self.split_concatenated_words(filename)
-            new_filepath = os.path.join(self.directory, new_filename)
-            if old_filename != new_filepath:
-                os.rename(old_filename, new_filepath)
-                logging.info("Renamed '%s' to '%s'", filename, new_filename)
-        except FileExistsError:
-            logging.warning("Skipped renaming. File '%s' already exists.", filename)
-        except FileNotFoundError as e:
-            logging.error("File not found: %s", e)
-        except PermissionError as e:
-            logging.error("Permission denied: %s", e)
-        except OSError as e:
-            logging.error("OS error occurred: %s", e)
+        new_filename = _transform_filename(filename)
+        if new_filename != filename:
+            _rename_file(self.directory, filename, new_filename)
 
     def rename_files(self) -> None:
         """
-        Rename files in the current directory using multiprocessing for improved performance.
+        Rename files in the current directory using a thread pool for improved performance.
+
+        New names are computed up front so that files already in the desired
+        form never reach the pool. Renaming is I/O-bound, so threads are used
+        instead of processes, and small batches are renamed serially.
         """
         try:
-            # Get list of files to rename
-            files_to_rename = [
-                filename
-                for filename in os.listdir(self.directory)
-                if filename.endswith(".pdf")
-            ]
-
-            # Rename files in parallel using multiprocessing
-            with Pool(cpu_count()) as pool:
-                pool.map(self.rename_file, files_to_rename)
+            # Get list of files to rename; DirEntry caches the file type
+            with os.scandir(self.directory) as entries:
+                files_to_rename = [
+                    entry.name
+                    for entry in entries
+                    if entry.is_file(follow_symlinks=False)
+                    and entry.name.lower().endswith(".pdf")
+                ]
+
+            # Keep only the files whose name actually changes
+            renames: List[Tuple[str, str]] = []
+            for filename in files_to_rename:
+                new_filename = _transform_filename(filename)
+                if new_filename != filename:
+                    renames.append((filename, new_filename))
+            if not renames:
+                return
+
+            # Resolve the directory once and rename relative to it where supported
+            dir_fd: Optional[int] = None
+            if os.rename in os.supports_dir_fd:
+                dir_fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            rename_batch = partial(_rename_batch, self.directory, dir_fd=dir_fd)
+
+            try:
+                if len(renames) < self.SERIAL_THRESHOLD:
+                    rename_batch(renames)
+                else:
+                    # Rename files in parallel, handing each task a batch of
+                    # files so scheduling overhead is amortized
+                    max_workers = min(32, (os.cpu_count() or 1) * 4)
+                    chunk_size = max(1, len(renames) // (max_workers * 4))
+                    batches = [
+                        renames[i : i + chunk_size]
+                        for i in range(0, len(renames), chunk_size)
+                    ]
+                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        list(executor.map(rename_batch, batches))
+            finally:
+                if dir_fd is not None:
+                    os.close(dir_fd)
         except FileNotFoundError as e:
-            logging.error("File not found: %s", e)
+            logger.error("File not found: %s", e)
         except PermissionError as e:
-            logging.error("Permission denied: %s", e)
+            logger.error("Permission denied: %s", e)
         except OSError as e:
-            logging.error("OS error occurred: %s", e)
+            logger.error("OS error occurred: %s", e)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,18 @@
+import hashlib
+import heapq
+import json
 import os
 import subprocess
-from typing import List
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    import black
+    import isort
+except ImportError:
+    black = isort = None
 
 
 class PythonFileFormatter:
@@ -11,20 +23,96 @@ class PythonFileFormatter:
     ----------
     directory : str
         The root directory where the search for Python files begins.
+    max_workers : int
+        The number of batches formatted concurrently.
+    black_modes : Dict[str, black.Mode]
+        Maps project roots to the Black modes built from their settings.
+    BATCH_SIZE : int
+        The maximum number of files passed to a single Black or isort call.
+    HASH_CHUNK_SIZE : int
+        The number of bytes read at a time when hashing a large file.
+    CACHE_PATH : str
+        The JSON file recording the files formatted by previous runs.
+    CONFIG_FILES : Tuple[str, ...]
+        The configuration files of Black and isort looked for in a project root.
+    tool_versions : Optional[str]
+        The versions of Black and isort, once looked up.
+    fingerprints : Dict[str, str]
+        Maps project roots to the fingerprint of their formatting setup.
+    cache : Dict[str, Dict]
+        Maps project roots to their fingerprint and to their files' absolute
+        paths with [mtime_ns, size, digest] after formatting.
+    project_roots : Dict[str, str]
+        Maps directories to the project root Black resolves for their files.
 
     Methods:
     -------
+    scan_directory(path: str) -> Tuple[List[str], List[str]]:
+        Lists the subdirectories and Python files of a single directory.
+
     find_python_files() -> List[str]:
         Recursively finds all Python files in the directory.
 
+    project_root(file: str) -> str:
+        Finds the project root whose settings Black applies to a file.
+
+    load_black_mode(directory: str) -> black.Mode:
+        Builds the Black mode from the project's [tool.black] settings.
+
+    black_mode(root: str) -> Optional[black.Mode]:
+        Returns the Black mode for a project root, if Black is importable.
+
+    tool_fingerprint(root: str) -> str:
+        Describes the versions of Black and isort and a project's configuration.
+
+    project_cache(root: str) -> Dict[str, List]:
+        Returns the cache entries of a project formatted with its current setup.
+
+    load_cache() -> None:
+        Loads the record of files formatted by previous runs.
+
+    save_cache() -> None:
+        Writes the record of formatted files back to CACHE_PATH.
+
+    hash_file(file: str) -> str:
+        Computes the BLAKE2b digest of a file's contents.
+
+    is_unchanged(file: str) -> bool:
+        Checks whether a file is unchanged since it was last formatted.
+
+    record_formatted(file: str, digest: Optional[str] = None) -> None:
+        Records a freshly formatted file in the cache.
+
+    format_batch(files: List[str], black_mode: Optional[black.Mode] = None) -> bool:
+        Formats a batch of Python files with Black and isort.
+
+    copy_formatted(duplicate: str, original: str, digest: str) -> None:
+        Gives a duplicate file the formatted contents of its original.
+
+    split_batches(files: List[str], batch_size: int) -> List[List[str]]:
+        Splits files into batches of similar total size.
+
     format_files(files: List[str]) -> None:
-        Formats the given list of Python files using Black and isort.
+        Formats the given list of Python files in parallel using Black and isort.
 
     run() -> None:
         Executes the process of finding and formatting Python files.
     """
 
-    def __init__(self, directory: str):
+    BATCH_SIZE: int = 500
+    HASH_CHUNK_SIZE: int = 1 << 20
+    CACHE_PATH: str = os.path.join(
+        os.path.expanduser("~"), ".cache", "python_formatter", "cache.json"
+    )
+    CONFIG_FILES: Tuple[str, ...] = (
+        "pyproject.toml",
+        "setup.cfg",
+        "tox.ini",
+        ".isort.cfg",
+        ".editorconfig",
+    )
+
+    def __init__(self, directory: str, max_workers: Optional[int] = None):
         """
         Initializes the PythonFileFormatter with the root directory.
 
@@ -32,51 +120,595 @@ class PythonFileFormatter:
         ----------
         directory : str
             The root directory where the search for Python files begins.
+        max_workers : Optional[int]
+            The number of batches formatted concurrently. Defaults to the CPU count.
         """
         self.directory: str = directory
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.black_modes: Dict[str, "black.Mode"] = {}
+        self.tool_versions: Optional[str] = None
+        self.fingerprints: Dict[str, str] = {}
+        self.cache: Dict[str, Dict] = {}
+        self.project_roots: Dict[str, str] = {}
+
+    @staticmethod
+    def scan_directory(path: str) -> Tuple[List[str], List[str]]:
+        """
+        Lists the subdirectories and Python files of a single directory.
+
+        '.git' directories are left out of the subdirectories, since they hold
+        no Python sources and can contain many thousands of object files.
+
+        Parameters:
+        ----------
+        path : str
+            The directory to scan.
+
+        Returns:
+        -------
+        Tuple[List[str], List[str]]
+            The paths of the subdirectories and of the Python files in `path`.
+        """
+        subdirectories: List[str] = []
+        python_files: List[str] = []
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            return subdirectories, python_files
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != ".git":
+                        subdirectories.append(entry.path)
+                elif entry.name.endswith(".py"):
+                    python_files.append(entry.path)
+        return subdirectories, python_files
 
     def find_python_files(self) -> List[str]:
         """
         Recursively finds all Python files in the given directory.
 
+        Each level of the tree is scanned in parallel on a thread pool, so
+        directory reads overlap instead of running one after another.
+
         Returns:
         -------
         List[str]
-            A list of paths to Python files found in the directory.
+            A list of absolute paths to Python files found in the directory.
         """
         python_files: List[str] = []
-        for root, _, files in os.walk(self.directory):
-            for file in files:
-                if file.endswith(".py"):
-                    python_files.append(os.path.join(root, file))
+        pending: List[str] = [os.path.abspath(self.directory)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending:
+                next_pending: List[str] = []
+                for subdirectories, files in executor.map(self.scan_directory, pending):
+                    next_pending.extend(subdirectories)
+                    python_files.extend(files)
+                pending = next_pending
         return python_files
 
+    def project_root(self, file: str) -> str:
+        """
+        Finds the project root whose settings Black applies to a file.
+
+        Like Black, the root is the nearest directory containing '.git', '.hg'
+        or a pyproject.toml with a [tool.black] section. Black's own lookup is
+        used when it is importable. Roots are remembered per directory.
+
+        Parameters:
+        ----------
+        file : str
+            The absolute path to the Python file.
+
+        Returns:
+        -------
+        str
+            The project root of the file.
+        """
+        directory = os.path.dirname(file)
+        root = self.project_roots.get(directory)
+        if root is not None:
+            return root
+        if black is not None:
+            found = black.find_project_root((directory,))[0]
+            root = str(found) if found is not None else directory
+        else:
+            root = directory
+            while True:
+                if os.path.exists(os.path.join(root, ".git")) or os.path.exists(
+                    os.path.join(root, ".hg")
+                ):
+                    break
+                try:
+                    with open(
+                        os.path.join(root, "pyproject.toml"), encoding="utf-8"
+                    ) as config_file:
+                        if "[tool.black]" in config_file.read():
+                            break
+                except (OSError, ValueError):
+                    pass
+                parent = os.path.dirname(root)
+                if parent == root:
+                    break
+                root = parent
+        self.project_roots[directory] = root
+        return root
+
+    @staticmethod
+    def load_black_mode(directory: str) -> "black.Mode":
+        """
+        Builds the Black mode from the project's [tool.black] settings.
+
+        The pyproject.toml is looked up from `directory` the same way the
+        command-line tool does, so in-process formatting of the project's
+        files gives the same output. Without a readable configuration, Black's defaults are used.
+
+        Parameters:
+        ----------
+        directory : str
+            The directory from which the project configuration is searched.
+
+        Returns:
+        -------
+        black.Mode
+            The mode to format files with.
+        """
+        try:
+            config_path = black.find_pyproject_toml((os.path.abspath(directory),))
+            config = black.parse_pyproject_toml(config_path) if config_path else {}
+        except (OSError, ValueError) as e:
+            print(f"Could not read the Black configuration: {e}")
+            config = {}
+        return black.Mode(
+            target_versions={
+                black.TargetVersion[version.upper()]
+                for version in config.get("target_version", [])
+            },
+            line_length=config.get("line_length", black.DEFAULT_LINE_LENGTH),
+            string_normalization=not config.get("skip_string_normalization", False),
+            magic_trailing_comma=not config.get("skip_magic_trailing_comma", False),
+            preview=config.get("preview", False),
+        )
+
+    def black_mode(self, root: str) -> Optional["black.Mode"]:
+        """
+        Returns the Black mode for a project root, if Black is importable.
+
+        Each project's mode is built once and reused for all its files.
+
+        Parameters:
+        ----------
+        root : str
+            The project root, as found by project_root.
+
+        Returns:
+        -------
+        Optional[black.Mode]
+            The mode to format the project's files with, or None if the
+            command-line tools must be used.
+        """
+        if black is None:
+            return None
+        mode = self.black_modes.get(root)
+        if mode is None:
+            mode = self.black_modes[root] = self.load_black_mode(root)
+        return mode
+
+    def tool_fingerprint(self, root: str) -> str:
+        """
+        Describes the versions of Black and isort and a project's configuration.
+
+        The fingerprint combines the tool versions, the project's Black mode,
+        the path and digest of the pyproject.toml Black uses, and the digests
+        of the other configuration files in the project root, so a tool
+        upgrade or a settings change invalidates the project's cache.
+
+        Parameters:
+        ----------
+        root : str
+            The project root, as found by project_root.
+
+        Returns:
+        -------
+        str
+            The hexadecimal digest identifying the formatting setup.
+        """
+        if self.tool_versions is None:
+            if black is not None:
+                versions = [black.__version__, isort.__version__]
+            else:
+                versions = []
+                for command in (["black", "--version"], ["isort", "--version-number"]):
+                    try:
+                        versions.append(
+                            subprocess.run(
+                                command, capture_output=True, text=True
+                            ).stdout.strip()
+                        )
+                    except OSError:
+                        versions.append("")
+            self.tool_versions = "\0".join(versions)
+
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(self.tool_versions.encode())
+        hasher.update(f"\0{self.black_mode(root)!r}".encode())
+        config_paths: List[str] = [
+            os.path.join(root, name) for name in self.CONFIG_FILES
+        ]
+        if black is not None:
+            black_config = black.find_pyproject_toml((root,))
+            if black_config and black_config not in config_paths:
+                config_paths.append(black_config)
+        for path in config_paths:
+            try:
+                digest = self.hash_file(path)
+            except OSError:
+                digest = ""
+            hasher.update(f"\0{path}:{digest}".encode())
+        return hasher.hexdigest()
+
+    def project_cache(self, root: str) -> Dict[str, List]:
+        """
+        Returns the cache entries of a project formatted with its current setup.
+
+        The first lookup of a project in a run computes its fingerprint; if it
+        differs from the recorded one, the project's entries are dropped.
+        Other projects in the cache are left alone.
+
+        Parameters:
+        ----------
+        root : str
+            The project root, as found by project_root.
+
+        Returns:
+        -------
+        Dict[str, List]
+            Maps the project's file paths to their [mtime_ns, size, digest].
+        """
+        if root not in self.fingerprints:
+            fingerprint = self.fingerprints[root] = self.tool_fingerprint(root)
+            project = self.cache.get(root)
+            if project is None or project.get("fingerprint") != fingerprint:
+                self.cache[root] = {"fingerprint": fingerprint, "files": {}}
+        return self.cache[root]["files"]
+
+    def load_cache(self) -> None:
+        """
+        Loads the record of files formatted by previous runs.
+
+        A missing or unreadable cache file leaves the cache empty, and
+        entries not in the per-project format are ignored.
+        """
+        try:
+            with open(self.CACHE_PATH, "r", encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        self.cache = {
+            root: project
+            for root, project in data.items()
+            if isinstance(project, dict) and isinstance(project.get("files"), dict)
+        }
+
+    def save_cache(self) -> None:
+        """
+        Writes the record of formatted files back to CACHE_PATH.
+
+        The cache is written to a temporary file and moved into place, so an
+        interrupted run never leaves a truncated cache.
+        """
+        temp_path = f"{self.CACHE_PATH}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.CACHE_PATH), exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(self.cache, cache_file)
+            os.replace(temp_path, self.CACHE_PATH)
+        except OSError as e:
+            print(f"Could not write the formatter cache {self.CACHE_PATH}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def hash_file(file: str) -> str:
+        """
+        Computes the BLAKE2b digest of a file's contents.
+
+        Files larger than HASH_CHUNK_SIZE are hashed in chunks of that size,
+        so large generated files are never held in memory at once.
+
+        Parameters:
+        ----------
+        file : str
+            The path to the file to hash.
+
+        Returns:
+        -------
+        str
+            The hexadecimal digest of the file.
+        """
+        with open(file, "rb", buffering=0) as f:
+            if os.fstat(f.fileno()).st_size <= PythonFileFormatter.HASH_CHUNK_SIZE:
+                return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+            hasher = hashlib.blake2b(digest_size=16)
+            for chunk in iter(
+                partial(f.read, PythonFileFormatter.HASH_CHUNK_SIZE), b""
+            ):
+                hasher.update(chunk)
+            return hasher.hexdigest()
+
+    def is_unchanged(self, file: str) -> bool:
+        """
+        Checks whether a file is unchanged since it was last formatted.
+
+        A matching modification time and size is trusted as is. If only the
+        modification time differs, as after a Git checkout, the contents are
+        hashed and compared with the recorded digest.
+
+        Parameters:
+        ----------
+        file : str
+            The absolute path to the Python file, as found by find_python_files.
+
+        Returns:
+        -------
+        bool
+            True if the file can be skipped, False if it must be formatted.
+        """
+        entry = self.project_cache(self.project_root(file)).get(file)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(file)
+            if stat.st_size != entry[1]:
+                return False
+            if stat.st_mtime_ns == entry[0]:
+                return True
+            if self.hash_file(file) != entry[2]:
+                return False
+        except OSError:
+            return False
+        entry[0] = stat.st_mtime_ns
+        return True
+
+    def record_formatted(self, file: str, digest: Optional[str] = None) -> None:
+        """
+        Records a freshly formatted file in the cache.
+
+        Parameters:
+        ----------
+        file : str
+            The absolute path to the formatted file.
+        digest : Optional[str]
+            The digest of the file's contents, if already known.
+        """
+        stat = os.stat(file)
+        self.project_cache(self.project_root(file))[file] = [
+            stat.st_mtime_ns,
+            stat.st_size,
+            digest or self.hash_file(file),
+        ]
+
+    @staticmethod
+    def format_batch(
+        files: List[str], black_mode: Optional["black.Mode"] = None
+    ) -> bool:
+        """
+        Formats a batch of Python files with Black and isort.
+
+        When a Black mode is given, Black and isort are called in-process,
+        which skips the interpreter startup of the command-line tools, and
+        isort runs quietly. Otherwise the command-line tools are run as
+        subprocesses, once per batch, and their standard output is discarded. In both cases a file
+        that cannot be formatted does not stop the run: the remaining files
+        are still formatted, and the batch is reported with the errors and
+        marked as failed.
+
+        Parameters:
+        ----------
+        files : List[str]
+            The paths to the Python files to format.
+        black_mode : Optional[black.Mode]
+            The Black mode for in-process formatting, or None to run the
+            command-line tools.
+
+        Returns:
+        -------
+        bool
+            True if the batch was formatted, False if a tool failed.
+        """
+        if black_mode is not None:
+            print(f"Formatting {len(files)} files with Black and isort...")
+            errors: List[str] = []
+            for file in files:
+                try:
+                    black.format_file_in_place(
+                        Path(file),
+                        fast=False,
+                        mode=black_mode,
+                        write_back=black.WriteBack.YES,
+                    )
+                    isort.file(file, quiet=True)
+                except Exception as e:
+                    errors.append(f"{file}: {e}")
+            if errors:
+                print(
+                    f"Formatting failed for a batch of {len(files)} files; "
+                    "they will be retried on the next run."
+                )
+                print("\n".join(errors))
+                return False
+            return True
+
+        print(f"Formatting {len(files)} files with Black...")
+        black_result = subprocess.run(
+            ["black", *files], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        print(f"Sorting imports in {len(files)} files with isort...")
+        isort_result = subprocess.run(
+            ["isort", *files], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        if black_result.returncode or isort_result.returncode:
+            print(
+                f"Formatting failed for a batch of {len(files)} files; "
+                "they will be retried on the next run."
+            )
+            for result in (black_result, isort_result):
+                if result.returncode:
+                    print(result.stderr.decode(errors="replace").rstrip())
+            return False
+        return True
+
+    def copy_formatted(self, duplicate: str, original: str, digest: str) -> None:
+        """
+        Gives a duplicate file the formatted contents of its original.
+
+        The duplicate is only rewritten if formatting changed the original.
+
+        Parameters:
+        ----------
+        duplicate : str
+            The absolute path to the file that was not formatted itself.
+        original : str
+            The absolute path to the formatted file with the same contents.
+        digest : str
+            The digest both files had before formatting.
+        """
+        formatted_digest: str = self.project_cache(self.project_root(original))[
+            original
+        ][2]
+        if formatted_digest != digest:
+            with open(original, "rb") as source:
+                contents = source.read()
+            with open(duplicate, "wb") as target:
+                target.write(contents)
+        self.record_formatted(duplicate, formatted_digest)
+
+    @staticmethod
+    def split_batches(files: List[str], batch_size: int) -> List[List[str]]:
+        """
+        Splits files into batches of similar total size.
+
+        Files are assigned largest first to the batch with the fewest bytes so
+        far, so no batch is left with all the large files.
+
+        Parameters:
+        ----------
+        files : List[str]
+            The paths to the files to split.
+        batch_size : int
+            The maximum number of files in a batch.
+
+        Returns:
+        -------
+        List[List[str]]
+            The batches of file paths.
+        """
+        batch_count: int = (len(files) + batch_size - 1) // batch_size
+        batches: List[List[str]] = [[] for _ in range(batch_count)]
+        batch_sizes: List[Tuple[int, int]] = [(0, i) for i in range(batch_count)]
+        for size, file in sorted(
+            ((os.path.getsize(file), file) for file in files), reverse=True
+        ):
+            total, index = heapq.heappop(batch_sizes)
+            batches[index].append(file)
+            if len(batches[index]) < batch_size:
+                heapq.heappush(batch_sizes, (total + size, index))
+        return batches
+
     def format_files(self, files: List[str]) -> None:
         """
-        Formats the given list of Python files using Black and isort.
+        Formats the given list of Python files in parallel using Black and isort.
+
+        Files with identical contents in the same project are formatted once,
+        and the result is copied to the duplicates. Files of different
+        projects may be formatted with different settings, so their results
+        are never shared. The remaining files are split into one batch per
+        worker, capped at BATCH_SIZE paths to stay within the command-line
+        length limit, so Black and isort start once per batch instead of once
+        per file. A batch only holds files of one project root, so the
+        command-line tools apply the same settings as when run on each file
+        alone. In-process formatting runs the batches on a process pool, since
+        Black and isort hold the GIL; subprocess batches run on a thread pool.
+        Files of a batch that formatted cleanly are recorded in the cache, and
+        a failed batch is left out so it is retried on the next run.
 
         Parameters:
         ----------
         files : List[str]
-            A list of paths to Python files to format.
+            A list of paths to Python files to format. Relative paths are
+            made absolute, so they match the cache keys of later runs.
         """
-        for file in files:
-            print(f"Formatting {file} with Black...")
-            subprocess.run(["black", file], check=True)
-            print(f"Sorting imports in {file} with isort...")
-            subprocess.run(["isort", file], check=True)
+        originals: Dict[Tuple[str, str], str] = {}
+        duplicates: List[Tuple[str, str, str]] = []
+        for file in map(os.path.abspath, files):
+            digest = self.hash_file(file)
+            original = originals.setdefault((self.project_root(file), digest), file)
+            if original != file:
+                duplicates.append((file, original, digest))
+        unique_files: List[str] = list(originals.values())
+
+        batch_size: int = min(
+            self.BATCH_SIZE,
+            max(1, (len(unique_files) + self.max_workers - 1) // self.max_workers),
+        )
+        projects: Dict[str, List[str]] = {}
+        for file in unique_files:
+            projects.setdefault(self.project_root(file), []).append(file)
+        batches: List[List[str]] = []
+        modes: List[Optional["black.Mode"]] = []
+        for root, project_files in projects.items():
+            project_batches = self.split_batches(project_files, batch_size)
+            batches.extend(project_batches)
+            modes.extend([self.black_mode(root)] * len(project_batches))
+        formatted: Set[str] = set()
+        executor_class = ThreadPoolExecutor if black is None else ProcessPoolExecutor
+        with executor_class(max_workers=self.max_workers) as executor:
+            for batch, succeeded in zip(
+                batches, executor.map(self.format_batch, batches, modes)
+            ):
+                if succeeded:
+                    formatted.update(batch)
+                    for file in batch:
+                        self.record_formatted(file)
+
+        if duplicates:
+            print(f"Reusing the formatting of {len(duplicates)} duplicate files.")
+        for duplicate, original, digest in duplicates:
+            if original in formatted:
+                self.copy_formatted(duplicate, original, digest)
 
     def run(self) -> None:
         """
         Executes the process of finding and formatting Python files.
+
+        Files that are unchanged since a previous run formatted them with the
+        same tool versions and project configuration are skipped.
         """
         print(f"Searching for Python files in {self.directory}...")
         python_files: List[str] = self.find_python_files()
-        if python_files:
-            print(f"Found {len(python_files)} Python files.")
-            self.format_files(python_files)
-        else:
+        if not python_files:
             print("No Python files found.")
+            return
+
+        print(f"Found {len(python_files)} Python files.")
+        self.load_cache()
+        changed_files: List[str] = [
+            file for file in python_files if not self.is_unchanged(file)
+        ]
+        if len(changed_files) < len(python_files):
+            print(
+                f"Skipping {len(python_files) - len(changed_files)} files "
+                "unchanged since the last run."
+            )
+        try:
+            if changed_files:
+                self.format_files(changed_files)
+        finally:
+            self.save_cache()
 
 
 if __name__ == "__main__":